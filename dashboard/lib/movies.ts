@@ -44,10 +44,14 @@ const getAllMovies = unstable_cache(
     async () => {
         try {
             const snapshot = await getDb().collection('movies').get();
-            return snapshot.docs.map(doc => ({
-                ...doc.data(),
-                id: doc.id // Ensure Firestore string ID is used and not overwritten
-            })) as Movie[];
+            return snapshot.docs.map(doc => {
+                const data = doc.data();
+                delete data._hash; // Scraper's change-detection field, not movie data
+                return {
+                    ...data,
+                    id: doc.id // Ensure Firestore string ID is used and not overwritten
+                };
+            }) as Movie[];
         } catch (error) {
             console.error("Error fetching all movies from Firestore:", error);
             return [];
@@ -1,15 +1,28 @@
+import asyncio
+import hashlib
 import json
 import math
 import os
-import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from heapq import nlargest
+from operator import itemgetter
 
+import aiohttp
 import firebase_admin
+import numpy as np
+import orjson
+import pandas as pd
 import requests
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
 from firebase_admin import credentials, firestore
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from utils.logger import get_logger
+from utils.aimd import AIMDController
+from utils.http_cache import ResponseCache
+from utils.logger import flush_logs, get_logger
 
 # --- INITIALIZATION AND CONFIGURATION ---
 load_dotenv()
@@ -23,10 +36,43 @@ HEADERS = {
     "Authorization": f"Bearer {TMDB_BEARER_TOKEN}"
 }
 
+# Shared keep-alive session for synchronous TMDB calls (reuses TCP/TLS connections)
+http_session = requests.Session()
+http_session.headers.update(HEADERS)
+http_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+))
+
+# Local cache of TMDB responses so re-runs skip the network (set TMDB_CACHE_TTL=0 to disable)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+CACHE_TTL_SECONDS = int(os.getenv("TMDB_CACHE_TTL", "3600"))
+response_cache = ResponseCache(CACHE_DIR, max_age=CACHE_TTL_SECONDS)
+
+# Maximum number of simultaneous connections to the TMDB API
+MAX_CONNECTIONS_PER_HOST = 16
+
+# Token bucket for TMDB requests: bursts up to the limit, then paces smoothly
+# (TMDB allows ~50 req/s, we stay safely below that)
+MAX_REQUESTS_PER_SECOND = 40
+rate_limiter = AsyncLimiter(MAX_REQUESTS_PER_SECOND, 1)
+
+# Adaptive number of in-flight requests: grows on healthy responses, halves on 429/5xx
+concurrency = AIMDController(initial_limit=8, max_limit=MAX_CONNECTIONS_PER_HOST)
+MAX_FETCH_ATTEMPTS = 3
+
+# Firestore write settings (500 is the maximum number of operations per batch)
+FIRESTORE_BATCH_SIZE = 500
+FIRESTORE_MAX_WORKERS = 8
+
 # Filtering Criteria
 MIN_VOTE_COUNT = 10
 MIN_RATING = 0.1
 
+# Maximum pages (20 movies each) fetched per genre and decade
+PAGES_PER_DECADE = 3
+
 # Global Decades for Movie Collection
 DECADES = [
     ("1980-01-01", "1989-12-31"),
@@ -59,7 +105,7 @@ def initialize_firebase():
             raise FileNotFoundError(f"Critical error: File not found at path {cert_path}")
             
         cred = credentials.Certificate(cert_path)
-        logger.info(f"Firebase initialized via local file: {cert_path}")
+        logger.info("Firebase initialized via local file: %s", cert_path)
 
     if not firebase_admin._apps:
         firebase_admin.initialize_app(cred)
@@ -82,9 +128,12 @@ def is_valid_movie(m, min_votes=0):
 
 
 # MARK: format_movie_data()
-def format_movie_data(m, genre_map):
-    """Transforms TMDB API raw data into our internal dictionary format."""
-    genre_names = [genre_map.get(gid, "Other") for gid in m.get("genre_ids", [])] if m.get("genre_ids") else ["Other"]
+def format_movie_data(m, genre_lookup):
+    """
+    Transforms TMDB API raw data into our internal dictionary format.
+    `genre_lookup` is a defaultdict mapping genre ID -> name with "Other" for unknown IDs.
+    """
+    genre_names = list(map(genre_lookup.__getitem__, m.get("genre_ids") or [])) or ["Other"]
     return {
         "id": m["id"],
         "title": m["title"],
@@ -92,193 +141,324 @@ def format_movie_data(m, genre_map):
         "genres": genre_names,
         "poster_path": m.get("poster_path"),
         "release_date": m.get("release_date"),
-        "popularity": m.get("popularity"),
-        "vote_count": m.get("vote_count")
+        "popularity": m.get("popularity") or 0,
+        "vote_count": m.get("vote_count") or 0
     }
 
 
+# MARK: content_hash()
+def content_hash(data):
+    """Returns a stable SHA-1 hash of a JSON-serializable dict (used to detect unchanged documents)."""
+    return hashlib.sha1(orjson.dumps(data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
 # --- API DATA EXTRACTION ---
 
 # MARK: fetch_genre_map()
 def fetch_genre_map():
     """Fetches the genre map from the TMDB API."""
     url = f"{BASE_URL}/genre/movie/list?language=en"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        genres = response.json().get("genres", [])
-        return {g["id"]: g["name"] for g in genres}
-    else:
-        logger.warning("Failed to fetch genres from API, using fallback.")
-        return {}
+    data = response_cache.get(url)
+    if data is None:
+        # Revalidate an expired cache entry instead of downloading the list again
+        etag, cached_body = response_cache.get_validator(url)
+        response = http_session.get(url, headers={"If-None-Match": etag} if etag else None)
+        if response.status_code == 304:
+            response_cache.touch(url)
+            data = cached_body
+        elif response.status_code == 200:
+            data = orjson.loads(response.content)
+            response_cache.set(url, data, response.headers.get("ETag"))
+        else:
+            logger.warning("Failed to fetch genres from API, using fallback.")
+            return {}
+
+    genres = data.get("genres", [])
+    return {g["id"]: g["name"] for g in genres}
+
+
+# MARK: fetch_json()
+async def fetch_json(session, url):
+    """
+    Performs a rate-limited async GET request. Returns (status, parsed JSON or None).
+    Requests rejected with 429/5xx or failing with a connection error/timeout are retried
+    after the back-off requested by the server (status is None if every attempt failed to connect).
+    Successful responses are served from / stored in the local response cache;
+    expired entries are revalidated with If-None-Match (a 304 reuses the cached body).
+    """
+    cached = response_cache.get(url)
+    if cached is not None:
+        return 200, cached
+
+    etag, cached_body = response_cache.get_validator(url)
+    headers = {"If-None-Match": etag} if etag else None
+
+    for attempt in range(1, MAX_FETCH_ATTEMPTS + 1):
+        try:
+            async with concurrency, rate_limiter, session.get(url, headers=headers) as response:
+                status = response.status
+                backoff = concurrency.record_response(status, response.headers)
+                if status == 304:
+                    response_cache.touch(url)
+                    return 200, cached_body
+                if status == 200:
+                    data = orjson.loads(await response.read())
+                    response_cache.set(url, data, response.headers.get("ETag"))
+                    return status, data
+            reason = f"Status {status}"
+            retryable = concurrency.is_throttled(status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Transient network failure: retry like the urllib3 Retry on the sync session does
+            status = None
+            backoff = concurrency.record_error()
+            reason = f"{type(e).__name__}: {e}"
+            retryable = True
+
+        if not retryable or attempt == MAX_FETCH_ATTEMPTS:
+            return status, None
+        logger.warning("  %s for %s, retrying in %.1fs (attempt %d/%d)", reason, url, backoff, attempt, MAX_FETCH_ATTEMPTS)
 
 
 # MARK: get_now_playing_movies()
-def get_now_playing_movies(genre_map, pages=2):
+async def get_now_playing_movies(session, genre_map, pages=2):
     """Fetches movies currently in theaters (Now Playing)."""
     processed_movies = []
+    genre_lookup = defaultdict(lambda: "Other", genre_map)
     
-    logger.info(f"Loading and processing {pages} pages of 'Now Playing' movies...")
-    for page in range(1, pages + 1):
-        url = f"{BASE_URL}/movie/now_playing?language=en-US&page={page}"
-        response = requests.get(url, headers=HEADERS)
-        time.sleep(0.3)
-        if response.status_code == 200:
-            movies_on_page = response.json().get("results", [])
+    logger.info("Loading and processing %d pages of 'Now Playing' movies...", pages)
+    urls = [f"{BASE_URL}/movie/now_playing?language=en-US&page={page}" for page in range(1, pages + 1)]
+    responses = await asyncio.gather(*(fetch_json(session, url) for url in urls))
+
+    for page, (status, data) in enumerate(responses, 1):
+        if status == 200:
+            movies_on_page = data.get("results", [])
             for m in movies_on_page:
                 if is_valid_movie(m):
-                    processed_movies.append(format_movie_data(m, genre_map))
+                    processed_movies.append(format_movie_data(m, genre_lookup))
             
-            logger.info(f"  [{page}/{pages}] Processed 'Now Playing' page")
+            logger.info("  [%d/%d] Processed 'Now Playing' page", page, pages)
         else:
-            logger.warning(f"  Error on page {page} for 'Now Playing': status {response.status_code}")
+            logger.warning("  Error on page %d for 'Now Playing': status %s", page, status)
 
-    logger.info(f"Found {len(processed_movies)} 'Now Playing' records")
+    logger.info("Found %d 'Now Playing' records", len(processed_movies))
     return processed_movies
 
 
+# MARK: _discover_url()
+def _discover_url(genre_id, start_date, end_date, page):
+    """Builds the /discover/movie URL for one genre, decade and page."""
+    return (f"{BASE_URL}/discover/movie?language=en-US"
+            f"&sort_by=popularity.desc"
+            f"&with_genres={genre_id}"
+            f"&primary_release_date.gte={start_date}"
+            f"&primary_release_date.lte={end_date}"
+            f"&page={page}"
+            f"&vote_count.gte={MIN_VOTE_COUNT}")
+
+
 # MARK: get_movies_by_genres()
-def get_movies_by_genres(genre_map):
+async def get_movies_by_genres(session, genre_map):
     """
     Retrieves popular movies for each genre, stratified by decades 
     to ensure a diverse and historically rich dataset.
     """
     processed_movies = []
+    genre_lookup = defaultdict(lambda: "Other", genre_map)
+    # The same movie is usually returned for several genres; keep only its first occurrence
+    seen_ids = set()
+    duplicates_count = 0
     
-    logger.info(f"Starting collection by genres (stratified by {len(DECADES)} decades)...")
+    logger.info("Starting collection by genres (stratified by %d decades)...", len(DECADES))
 
-    genre_items = list(genre_map.items())
-    total_genres = len(genre_items)
+    total_genres = len(genre_map)
 
-    for g_idx, (genre_id, genre_name) in enumerate(genre_items, 1):
-        logger.info(f"[{g_idx}/{total_genres}] Processing genre: {genre_name}...")
-        
-        for start_date, end_date in DECADES:
-            # Fetch up to 3 pages (60 movies) per decade for each genre
-            for page in range(1, 4):
-                url = (f"{BASE_URL}/discover/movie?language=en-US"
-                       f"&sort_by=popularity.desc"
-                       f"&with_genres={genre_id}"
-                       f"&primary_release_date.gte={start_date}"
-                       f"&primary_release_date.lte={end_date}"
-                       f"&page={page}"
-                       f"&vote_count.gte={MIN_VOTE_COUNT}")
-                
-                response = requests.get(url, headers=HEADERS)
-                time.sleep(0.2) # Small delay to avoid API rate limiting
-                
-                if response.status_code != 200:
-                    logger.warning(f"  [{g_idx}/{total_genres}] Error for {genre_name}, decade {start_date[:4]}, page {page}: status {response.status_code}")
-                    break
-
-                movies_on_page = response.json().get("results", [])
-                if not movies_on_page:
-                    break
-                    
-                for m in movies_on_page:
-                    if is_valid_movie(m):
-                        processed_movies.append(format_movie_data(m, genre_map))
-                
-                logger.info(f"  [{g_idx}/{total_genres}]   Decade {start_date[:4]} | Page {page} processed")
+    # Every (genre, decade) combination starts on page 1
+    pending = [
+        (g_idx, genre_id, genre_name, start_date, end_date)
+        for g_idx, (genre_id, genre_name) in enumerate(genre_map.items(), 1)
+        for start_date, end_date in DECADES
+    ]
+
+    # Fetch page by page: each round requests the next page concurrently, but only for
+    # combinations whose previous page succeeded and reported more pages available
+    for page in range(1, PAGES_PER_DECADE + 1):
+        if not pending:
+            break
+
+        logger.info("Fetching page %d for %d genre/decade combinations concurrently...", page, len(pending))
+        responses = await asyncio.gather(*(
+            fetch_json(session, _discover_url(genre_id, start_date, end_date, page))
+            for _, genre_id, _, start_date, end_date in pending
+        ))
+
+        next_pending = []
+        for job, (status, data) in zip(pending, responses):
+            g_idx, _, genre_name, start_date, _ = job
+
+            if status != 200:
+                logger.warning("  [%d/%d] Error for %s, decade %s, page %d: status %s",
+                               g_idx, total_genres, genre_name, start_date[:4], page, status)
+                continue
 
+            movies_on_page = data.get("results", [])
+            if not movies_on_page:
+                continue
+
+            for m in movies_on_page:
+                if not is_valid_movie(m):
+                    continue
+
+                # Single hash operation: the set only grows if the ID was not seen before
+                seen_count = len(seen_ids)
+                seen_ids.add(m["id"])
+                if len(seen_ids) == seen_count:
+                    duplicates_count += 1
+                    continue
+
+                processed_movies.append(format_movie_data(m, genre_lookup))
+
+            logger.info("  [%d/%d] %s | Decade %s | Page %d processed",
+                        g_idx, total_genres, genre_name, start_date[:4], page)
+
+            if page < data.get("total_pages", 0):
+                next_pending.append(job)
+
+        pending = next_pending
+
+    logger.info("Collected %d unique movies by genres (%d duplicates skipped)", len(processed_movies), duplicates_count)
     return processed_movies
 
 
+# MARK: fetch_all_movies()
+async def fetch_all_movies(genre_map):
+    """Runs all movie collections concurrently over a single shared HTTP session."""
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS_PER_HOST)
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector) as session:
+        return await asyncio.gather(
+            get_now_playing_movies(session, genre_map, pages=2),
+            get_movies_by_genres(session, genre_map)
+        )
+
+
 # --- DATA PROCESSING AND STATISTICS ---
 
-# MARK: calculate_stats()
-def calculate_stats(movies, top_count=10):
-    """Calculates extended statistics by genre, including top N full movie objects."""
-    stats = defaultdict(list)
-    skipped_movies = []
+# MARK: build_movie_frame()
+def build_movie_frame(movies):
+    """
+    Converts the list of movie dicts into columnar form (one array per field) for vectorized statistics.
+    Row i of the frame describes movies[i], so the index maps results back to the full movie dicts.
+    Expects the normalized fields produced by format_movie_data().
+    """
+    return pd.DataFrame({
+        "rating": list(map(itemgetter("rating"), movies)),
+        "genres": pd.Series(list(map(itemgetter("genres"), movies)), dtype=object),
+        "popularity": list(map(itemgetter("popularity"), movies)),
+        "vote_count": list(map(itemgetter("vote_count"), movies)),
+        "release_date": pd.Series([m["release_date"] or "" for m in movies], dtype=object),
+    })
 
-    for m in movies:
-        # Ignore movies without ratings
-        if m.get("vote_count", 0) > 0 and m.get("rating", 0) > 0:
-            for genre in m["genres"]:
-                stats[genre].append(m)
-        else:
-            skipped_movies.append(m)
 
-    # Log movies without ratings for control
+# MARK: calculate_stats()
+def calculate_stats(movies, df, top_count=10):
+    """
+    Calculates extended statistics by genre, including top N full movie objects.
+    `df` is the columnar view of `movies` produced by build_movie_frame().
+    """
+    # Ignore movies without ratings
+    rated = (df["vote_count"] > 0) & (df["rating"] > 0)
+    skipped_movies = [movies[i] for i in df.index[~rated]]
+
+    # Log movies without ratings for control: a summary, with per-movie details at DEBUG level
     if skipped_movies:
-        logger.warning(f"\n⚠️ Found {len(skipped_movies)} movies without rating (skipped for statistics):")
-        for sm in skipped_movies:
-            genres_str = ", ".join(sm["genres"])
-            logger.warning(f" - {sm['title']} | Genres: [{genres_str}] | Rating: {sm.get('rating', 0)} (Votes: {sm.get('vote_count', 0)})")
-        logger.warning("-" * 50)
+        logger.warning("⚠️ Found %d movies without rating (skipped for statistics)", len(skipped_movies))
+        # One lazily formatted record: the list is only rendered if a handler emits DEBUG
+        logger.debug("Skipped movies details: %s", skipped_movies)
+
+    # Nothing to aggregate (exploding an empty selection would yield a NaN genre with code -1)
+    if not rated.any():
+        return []
+
+    # Weighted score to favor movies with fewer genres (Genre Purity).
+    # This makes posters on genre cards more unique and diverse.
+    score = df["popularity"] * df["rating"] / df["genres"].str.len()
+
+    # One row per (movie, genre); the index still points to the movie's position in `movies`
+    by_genre = df[rated].assign(score=score).explode("genres")
+    # Encode genre names once as integer category codes; the aggregation and top-N
+    # grouping below work on the small dense codes instead of hashing the name strings per row
+    by_genre["genres"] = by_genre["genres"].astype("category")
+    genre_names = by_genre["genres"].cat.categories
+    codes = by_genre["genres"].cat.codes.to_numpy()
+
+    # All per-genre sums in compiled single passes over flat arrays (bincount sums weights per code)
+    n_genres = len(genre_names)
+    movie_counts = np.bincount(codes, minlength=n_genres)
+    rating_sums = np.bincount(codes, weights=by_genre["rating"].to_numpy(dtype=float), minlength=n_genres)
+    popularity_sums = np.bincount(codes, weights=by_genre["popularity"].to_numpy(dtype=float), minlength=n_genres)
+    vote_sums = np.bincount(codes, weights=by_genre["vote_count"].to_numpy(dtype=float), minlength=n_genres)
+
+    # Find Top-N representative movies for each genre (stable sort keeps ties in input order)
+    top_rows = (
+        by_genre.sort_values("score", ascending=False, kind="stable")
+        .groupby("genres", sort=False, observed=True)
+        .head(top_count)
+    )
+    top_movies = defaultdict(list)
+    for genre, idx in zip(top_rows["genres"], top_rows.index):
+        top_movies[genre].append(movies[idx])
 
     genre_extended_stats = []
 
-    for genre, genre_movies in stats.items():
-        if not genre_movies:
+    for code, genre in enumerate(genre_names):
+        movie_count = int(movie_counts[code])
+        if not movie_count:
             continue
 
-        movie_count = len(genre_movies)
-
-        # Calculate averages
-        avg_rating = sum(m["rating"] for m in genre_movies) / movie_count
-        avg_popularity = sum(m.get("popularity", 0) for m in genre_movies) / movie_count
-        total_votes = sum(m.get("vote_count", 0) for m in genre_movies)
-
-        # Find Top-N representative movies for the genre.
-        # We use a weighted score to favor movies with fewer genres (Genre Purity).
-        # This makes posters on genre cards more unique and diverse.
-        top_movies = sorted(
-            genre_movies,
-            key=lambda x: (x.get("popularity", 0) * x.get("rating", 0)) / len(x.get("genres", [1])),
-            reverse=True
-        )[:top_count]
-
-        engagement_score = total_votes / movie_count if movie_count > 0 else 0
+        total_votes = int(round(vote_sums[code]))
+        engagement_score = total_votes / movie_count
 
         genre_extended_stats.append({
             "genre_name": genre,
-            "average_rating": round(avg_rating, 2),
-            "average_popularity": round(avg_popularity, 2),
+            "average_rating": round(float(rating_sums[code]) / movie_count, 2),
+            "average_popularity": round(float(popularity_sums[code]) / movie_count, 2),
             "total_votes": total_votes,
             "movie_count": movie_count,
             "engagement_score": round(engagement_score, 2),
-            "top_movies": top_movies
+            "top_movies": top_movies[genre]
         })
 
     return genre_extended_stats
 
 
 # MARK: _get_yearly_stats()
-def _get_yearly_stats(movies):
+def _get_yearly_stats(df):
     """Helper to calculate yearly best and most engaging years for global stats."""
-    year_groups = defaultdict(lambda: {"total_rating": 0, "total_votes": 0, "count": 0})
-    for m in movies:
-        if m.get("release_date"):
-            year = m["release_date"].split("-")[0]
-            year_groups[year]["total_rating"] += (m.get("rating") or 0)
-            year_groups[year]["total_votes"] += (m.get("vote_count") or 0)
-            year_groups[year]["count"] += 1
-    
+    dated = df[df["release_date"] != ""]
+    # pandas sums in a different order than a Python loop, so averages exactly on a
+    # rounding boundary may differ by 0.01 in the formatted output
+    year_groups = dated.groupby(dated["release_date"].str.split("-").str[0], sort=False).agg(
+        total_rating=("rating", "sum"),
+        total_votes=("vote_count", "sum"),
+        count=("rating", "size"),
+    )
+
+    # Both rankings only consider years with at least 15 movies (statistical significance)
     years = [
         {
             "year": year,
-            "avg_rating": data["total_rating"] / data["count"],
-            "engagement_score": data["total_votes"] / data["count"],
-            "count": data["count"],
+            "avg_rating": float(total_rating) / count,
+            "engagement_score": float(total_votes) / count,
+            "count": int(count),
         }
-        for year, data in year_groups.items()
-        if data["count"] > 0
+        for year, total_rating, total_votes, count in year_groups.itertuples()
+        if count >= 15
     ]
     
-    # Top 5 Best Years (Quality) - min 15 movies for statistical significance
-    top_best_years = sorted(
-        [y for y in years if y["count"] >= 15],
-        key=lambda x: x["avg_rating"],
-        reverse=True
-    )[:5]
+    # Top 5 Best Years (Quality)
+    top_best_years = nlargest(5, years, key=itemgetter("avg_rating"))
     
-    # Top 5 Most Engaging Years (Impact) - min 15 movies for statistical significance
-    top_engaging_years = sorted(
-        [y for y in years if y["count"] >= 15],
-        key=lambda x: x["engagement_score"],
-        reverse=True
-    )[:5]
+    # Top 5 Most Engaging Years (Impact)
+    top_engaging_years = nlargest(5, years, key=itemgetter("engagement_score"))
     
     return {
         "topBestYears": [{
@@ -297,10 +477,12 @@ def _get_yearly_stats(movies):
 # MARK: _get_genre_diversity()
 def _get_genre_diversity(movies):
     """Helper to calculate genre combinations and averages for global stats."""
-    total_genres_count = sum(len(m.get("genres", [])) for m in movies)
+    # Genre total and pair counts are accumulated in a single pass over the movies
+    total_genres_count = 0
     pair_counts = defaultdict(int)
     for m in movies:
-        genres = m.get("genres", [])
+        genres = m["genres"]
+        total_genres_count += len(genres)
         if len(genres) > 1:
             sorted_genres = sorted(genres)
             for i in range(len(sorted_genres)):
@@ -308,11 +490,10 @@ def _get_genre_diversity(movies):
                     pair = f"{sorted_genres[i]} + {sorted_genres[j]}"
                     pair_counts[pair] += 1
     
-    top_tandems = sorted(
-        [{"pair": pair, "count": count} for pair, count in pair_counts.items()],
-        key=lambda x: x["count"],
-        reverse=True
-    )[:5]
+    top_tandems = [
+        {"pair": pair, "count": count}
+        for pair, count in nlargest(5, pair_counts.items(), key=itemgetter(1))
+    ]
     
     return {
         "avgGenresPerMovie": f"{(total_genres_count / len(movies)):.1f}" if movies else "0.0",
@@ -325,22 +506,22 @@ def _get_hidden_gems(movies):
     """Helper to find high-rated but less popular movies for global stats."""
     hidden_gems = [
         m for m in movies 
-        if (m.get("rating") or 0) >= 7.8 and 
-           (m.get("popularity") or 0) < 25 and 
-           200 <= (m.get("vote_count") or 0) < 1500 and
-           "Documentary" not in m.get("genres", []) and
-           "Animation" not in m.get("genres", []) and
-           "TV Movie" not in m.get("genres", []) and
-           m.get("release_date") and int(m["release_date"].split("-")[0]) >= 2000
+        if m["rating"] >= 7.8 and 
+           m["popularity"] < 25 and 
+           200 <= m["vote_count"] < 1500 and
+           "Documentary" not in m["genres"] and
+           "Animation" not in m["genres"] and
+           "TV Movie" not in m["genres"] and
+           m["release_date"] and int(m["release_date"].split("-")[0]) >= 2000
     ]
-    return sorted(hidden_gems, key=lambda x: x["rating"], reverse=True)[:15]
+    return nlargest(15, hidden_gems, key=itemgetter("rating"))
 
 
 # MARK: calculate_global_stats()
-def calculate_global_stats(movies):
+def calculate_global_stats(movies, df):
     """Calculates yearly trends, genre diversity and hidden gems."""
     return {
-        "yearly_stats": _get_yearly_stats(movies),
+        "yearly_stats": _get_yearly_stats(df),
         "genre_diversity": _get_genre_diversity(movies),
         "hidden_gems": _get_hidden_gems(movies),
         "updated_at": firestore.SERVER_TIMESTAMP
@@ -349,26 +530,54 @@ def calculate_global_stats(movies):
 
 # --- CLOUD STORAGE OPERATIONS (FIRESTORE) ---
 
+# MARK: _commit_in_parallel()
+def _commit_in_parallel(items, add_to_batch, label):
+    """Splits items into Firestore batches and commits them concurrently from a thread pool."""
+    chunks = [items[i : i + FIRESTORE_BATCH_SIZE] for i in range(0, len(items), FIRESTORE_BATCH_SIZE)]
+
+    def commit_chunk(numbered_chunk):
+        number, chunk = numbered_chunk
+        batch = db.batch()
+        for item in chunk:
+            add_to_batch(batch, item)
+        batch.commit()
+        logger.info("  Batch %d/%d (%s) committed: %d documents", number, len(chunks), label, len(chunk))
+
+    with ThreadPoolExecutor(max_workers=FIRESTORE_MAX_WORKERS) as executor:
+        # Consume the results so that a failed commit raises here
+        list(executor.map(commit_chunk, enumerate(chunks, 1)))
+
+
 # MARK: upload_to_firebase()
 def upload_to_firebase(movies, stats, global_stats):
-    """Writes processed data to Firestore using batches and removes obsolete records."""
-    
-    # 1. Collect new movie IDs for fast lookup
-    new_movie_ids = {str(movie["id"]) for movie in movies}
+    """
+    Writes processed data to Firestore using batches and removes obsolete records.
+    Movies whose content hash matches the stored `_hash` field are not rewritten.
+    """
+    movies_col = db.collection("movies")
 
-    # --- 1. Upload movies in batches ---
-    logger.info(f"Uploading {len(movies)} movies to Firestore in batches...")
-    batch_size = 500
-    for i in range(0, len(movies), batch_size):
-        batch = db.batch()
-        chunk = movies[i : i + batch_size]
+    # 1. Collect new movie IDs and content hashes for fast lookup
+    new_hashes = {str(movie["id"]): content_hash(movie) for movie in movies}
 
-        for movie in chunk:
-            movie_ref = db.collection("movies").document(str(movie["id"]))
-            batch.set(movie_ref, movie)
+    # Read existing IDs with their stored hashes in one query
+    # Use select(["_hash"]), to avoid fetching full document data (saves bandwidth)
+    existing_hashes = {
+        doc.id: (doc.to_dict() or {}).get("_hash")
+        for doc in movies_col.select(["_hash"]).stream()
+    }
 
-        batch.commit()
-        logger.info(f"  Batch {i // batch_size + 1} (movies) uploaded")
+    # --- 1. Upload new and changed movies in batches ---
+    changed_movies = [m for m in movies if existing_hashes.get(str(m["id"])) != new_hashes[str(m["id"])]]
+    logger.info("Uploading %d new or changed movies to Firestore in batches (%d unchanged skipped)...",
+                len(changed_movies), len(movies) - len(changed_movies))
+    _commit_in_parallel(
+        changed_movies,
+        lambda batch, movie: batch.set(
+            movies_col.document(str(movie["id"])),
+            {**movie, "_hash": new_hashes[str(movie["id"])]}
+        ),
+        "movies"
+    )
 
     # --- 2. Update stats ---
     logger.info("Updating genre and global statistics...")
@@ -381,27 +590,17 @@ def upload_to_firebase(movies, stats, global_stats):
 
     # --- 3. Cleaning obsolete movies ---
     logger.info("Checking for obsolete movies...")
-    
-    # Get all existing document IDs in the collection
-    # Use select([]), to avoid fetching full document data (saves bandwidth)
-    existing_docs = db.collection("movies").select([]).stream()
-    existing_ids = {doc.id for doc in existing_docs}
 
     # Find the difference: what is in the database but not in the new list
-    ids_to_delete = list(existing_ids - new_movie_ids)
+    ids_to_delete = list(existing_hashes.keys() - new_hashes.keys())
 
     if ids_to_delete:
-        logger.info(f"Found {len(ids_to_delete)} obsolete movies. Deleting...")
-        for i in range(0, len(ids_to_delete), batch_size):
-            batch = db.batch()
-            chunk_to_delete = ids_to_delete[i : i + batch_size]
-            
-            for doc_id in chunk_to_delete:
-                doc_ref = db.collection("movies").document(doc_id)
-                batch.delete(doc_ref)
-                
-            batch.commit()
-            logger.info(f"  Deleted batch of {len(chunk_to_delete)} old movies")
+        logger.info("Found %d obsolete movies. Deleting...", len(ids_to_delete))
+        _commit_in_parallel(
+            ids_to_delete,
+            lambda batch, doc_id: batch.delete(movies_col.document(doc_id)),
+            "obsolete movies"
+        )
     else:
         logger.info("No obsolete movies to remove")
 
@@ -414,32 +613,39 @@ def clear_firestore():
     collections = ["movies", "genres", "stats"]
     for col in collections:
         db.recursive_delete(db.collection(col))
-        logger.info(f"Deleted all documents from collection '{col}'")
+        logger.info("Deleted all documents from collection '%s'", col)
 
 
 # --- MAIN EXECUTION ---
 
 if __name__ == "__main__":
-    # 1. Extraction
-    logger.info("Loading genres...")
-    genre_map = fetch_genre_map()
-    logger.info(f"Received {len(genre_map)} genres")
-
-    # Fetch different sets of movies independently
-    now_playing = get_now_playing_movies(genre_map, pages=2)
-    genres_data = get_movies_by_genres(genre_map)
+    try:
+        # 1. Extraction
+        logger.info("Loading genres...")
+        genre_map = fetch_genre_map()
+        logger.info("Received %d genres", len(genre_map))
+
+        # Fetch different sets of movies independently
+        now_playing, genres_data = asyncio.run(fetch_all_movies(genre_map))
     
-    # Merge and remove duplicates using movie ID as key
-    all_raw = now_playing + genres_data
-    unique_map = {m["id"]: m for m in all_raw}
-    raw_data = list(unique_map.values())
+        # Merge and remove duplicates using movie ID as key
+        all_raw = now_playing + genres_data
+        unique_map = {m["id"]: m for m in all_raw}
+        raw_data = list(unique_map.values())
     
-    logger.info(f"Final collection size: {len(raw_data)} unique movies.")
-
-    # 2. Processing
-    genre_stats = calculate_stats(raw_data)
-    global_stats = calculate_global_stats(raw_data)
-    logger.info(f"Calculated statistics for {len(genre_stats)} genres and global trends.")
-
-    # 3. Cloud Synchronization
-    upload_to_firebase(raw_data, genre_stats, global_stats)
+        logger.info("Final collection size: %d unique movies.", len(raw_data))
+        flush_logs()
+
+        # 2. Processing
+        # Columnar view of the movies shared by the aggregations
+        movies_df = build_movie_frame(raw_data)
+        genre_stats = calculate_stats(raw_data, movies_df)
+        global_stats = calculate_global_stats(raw_data, movies_df)
+        logger.info("Calculated statistics for %d genres and global trends.", len(genre_stats))
+        flush_logs()
+
+        # 3. Cloud Synchronization
+        upload_to_firebase(raw_data, genre_stats, global_stats)
+    finally:
+        # Write out buffered log records before any traceback is printed
+        flush_logs()
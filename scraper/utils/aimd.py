@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+
+class AIMDController:
+    """
+    Adaptive concurrency limit for async HTTP calls (additive-increase / multiplicative-decrease).
+
+    The number of requests allowed in flight grows slowly while the server answers normally
+    and is halved on 429/5xx or connection errors (at most once per back-off window, so a burst
+    of concurrent failures counts as one congestion signal). Retry-After and
+    x-ratelimit-remaining headers pause new requests.
+
+    Usage:
+        async with controller:
+            response = await session.get(url)
+            controller.record_response(response.status, response.headers)
+    """
+
+    def __init__(self, initial_limit=8, max_limit=32, increase_step=0.5, decrease_factor=0.5, default_backoff=1.0):
+        self.limit = float(initial_limit)
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.default_backoff = default_backoff
+
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._decrease_until = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        await self.wait_if_throttled()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def wait_if_throttled(self):
+        """Sleeps until the server-requested pause (if any) is over."""
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def is_throttled(status):
+        """Returns True for responses that signal overload and are worth retrying (429/5xx)."""
+        return status == 429 or status >= 500
+
+    def record_response(self, status, headers):
+        """Adjusts the limit after a response. Returns the back-off delay in seconds (0 if healthy)."""
+        if self.is_throttled(status):
+            return self._back_off(self._parse_seconds(headers.get("Retry-After")))
+
+        self.limit = min(self.max_limit, self.limit + self.increase_step)
+        if headers.get("x-ratelimit-remaining") == "0":
+            self._pause(self.default_backoff)
+        return 0.0
+
+    def record_error(self):
+        """Adjusts the limit after a connection error or timeout. Returns the back-off delay in seconds."""
+        return self._back_off(self.default_backoff)
+
+    def _back_off(self, delay):
+        now = time.monotonic()
+        # Decrease only once per window: the other in-flight failures of the same burst don't count again
+        if now >= self._decrease_until:
+            self.limit = max(1.0, self.limit * self.decrease_factor)
+            self._decrease_until = now + max(delay, self.default_backoff)
+        self._pause(delay)
+        return delay
+
+    def _pause(self, delay):
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    def _parse_seconds(self, value):
+        # Retry-After may also be an HTTP date; fall back to the default back-off in that case
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return self.default_backoff
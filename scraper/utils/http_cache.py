@@ -0,0 +1,77 @@
+import hashlib
+import os
+import time
+
+import orjson
+
+
+class ResponseCache:
+    """
+    Disk-backed cache for JSON API responses, keyed by request URL.
+
+    Each response is stored as a separate file together with its ETag. Entries older than
+    `max_age` seconds are not served directly, but their ETag can still be used to revalidate
+    them with a conditional request (If-None-Match). A `max_age` of 0 disables the cache.
+    """
+
+    def __init__(self, directory, max_age=3600):
+        self.directory = directory
+        self.max_age = max_age
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_age > 0
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.md5(url.encode()).hexdigest() + ".json")
+
+    def _read(self, url):
+        """Returns (entry, age in seconds) for `url`, or (None, None) if there is no usable entry."""
+        if not self.enabled:
+            return None, None
+        path = self._path(url)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            with open(path, "rb") as f:
+                entry = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None, None
+        if not isinstance(entry, dict) or "body" not in entry:
+            return None, None
+        return entry, age
+
+    def get(self, url):
+        """Returns the cached body for `url`, or None if it is missing or expired."""
+        entry, age = self._read(url)
+        if entry is None or age >= self.max_age:
+            return None
+        return entry["body"]
+
+    def get_validator(self, url):
+        """Returns (etag, body) of the stored entry regardless of its age, or (None, None)."""
+        entry, _ = self._read(url)
+        if entry is None or not entry.get("etag"):
+            return None, None
+        return entry["etag"], entry["body"]
+
+    def set(self, url, body, etag=None):
+        """Stores the response body (and its ETag, if any) for `url`."""
+        if not self.enabled:
+            return
+        path = self._path(url)
+        # Write to a temp file first so an interrupted run never leaves a truncated entry
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps({"etag": etag, "body": body}))
+        os.replace(tmp_path, path)
+
+    def touch(self, url):
+        """Marks the entry for `url` as fresh again (after a 304 Not Modified response)."""
+        if not self.enabled:
+            return
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
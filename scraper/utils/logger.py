@@ -1,6 +1,7 @@
 import os
 import sys
 import logging
+from logging.handlers import MemoryHandler
 
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
@@ -33,7 +34,13 @@ console_log_format = "[%(asctime)s] [%(levelname)s] [%(funcName)s]: %(message)s"
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)  # only INFO and above will be printed to console
 console_handler.setFormatter(logging.Formatter(console_log_format, datefmt="%H:%M:%S"))
-logger.addHandler(console_handler)
+
+# Buffer console records and write them in batches instead of one write per record.
+# The buffer is flushed when full, on ERROR and above, via flush_logs() and at interpreter exit.
+# MemoryHandler.flush() bypasses the target's level check, so filter at the buffer itself.
+memory_handler = MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=console_handler)
+memory_handler.setLevel(console_handler.level)
+logger.addHandler(memory_handler)
 
 
 ###########################################################################
@@ -53,6 +60,11 @@ def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 
+# Function to write out buffered log records (call at checkpoints of long-running work)
+def flush_logs() -> None:
+    memory_handler.flush()
+
+
 # # Decorator
 # def log_function_call(func):
 #     def wrapper(*args, **kwargs):